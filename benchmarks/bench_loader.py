@@ -0,0 +1,327 @@
+"""
+Benchmarks for the supervisor_loader RPC hot paths at fleet scale.
+
+Each case is timed both in-process (calling the rpcinterface directly, the
+same way the unit tests do with a DummySupervisor) and, where it makes
+sense, over a real XML-RPC server listening on localhost.
+
+Results are reported as seconds per operation. They can be saved as a JSON
+baseline and later runs compared against it; the run fails (exit status 1)
+when any case is slower than its baseline by more than the threshold.
+
+Usage:
+    python benchmarks/bench_loader.py                  # run and compare
+    python benchmarks/bench_loader.py --save           # write the baseline
+    python benchmarks/bench_loader.py --threshold 0.5  # allow 50% slowdown
+    python benchmarks/bench_loader.py --quick          # small sizes only
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import timeit
+
+if sys.version_info > (2, 7):
+    from xmlrpc.client import ServerProxy, dumps
+    from xmlrpc.server import SimpleXMLRPCServer
+else:
+    from xmlrpclib import ServerProxy, dumps
+    from SimpleXMLRPCServer import SimpleXMLRPCServer
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import supervisor.options
+from supervisor.tests.base import DummySupervisor
+
+from supervisor_loader.rpcinterface import LoaderNamespaceRPCInterface
+
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+BASELINE_FORMAT = 1
+
+FLEET_SIZES = (1, 100, 1000, 10000)
+QUICK_SIZES = (1, 100, 1000)
+
+PROGRAM_OPTIONS = {
+    'command': '/bin/true',
+    'autostart': 'false',
+    'stdout_logfile': 'NONE',
+    'stderr_logfile': 'NONE',
+}
+
+
+# Fixtures
+
+def make_interface(**config):
+    supervisord = DummySupervisor()
+    supervisord.options = supervisor.options.ServerOptions()
+    supervisord.options.process_group_configs = []
+    return LoaderNamespaceRPCInterface(supervisord, **config)
+
+
+def fill_groups(interface, count, prefix='filler'):
+    for i in range(count):
+        interface.addGroup('%s_%d' % (prefix, i))
+
+
+def fill_group(interface, group_name, count):
+    """
+    Populates a group with `count` processes in a single pass so that the
+    fixture itself doesn't pay the per-call duplicate check being measured.
+    """
+    group = interface._get_process_group(group_name, True)
+    section_options = dict(PROGRAM_OPTIONS)
+    section_options['numprocs'] = str(count)
+    section_options['process_name'] = '%(program_name)s_%(process_num)d'
+    section_name = 'program:filler'
+    parser = interface._make_config_parser(section_name, section_options)
+    new_configs = interface.supervisord.options.processes_from_section(
+        parser, section_name, group_name)
+    group.config.process_configs.extend(new_configs)
+    for new_config in new_configs:
+        group.processes[new_config.name] = new_config.make_process(group)
+    return group
+
+
+class NamespaceDispatcher:
+    """
+    Routes `namespace.method` calls to the matching rpcinterface, the way
+    supervisord exposes `supervisor.*` and `loader.*`.
+    """
+    def __init__(self, **namespaces):
+        self.namespaces = namespaces
+
+    def _dispatch(self, method, params):
+        namespace, name = method.split('.', 1)
+        return getattr(self.namespaces[namespace], name)(*params)
+
+
+class LocalServer:
+    def __init__(self, interface):
+        self.server = SimpleXMLRPCServer(
+            ('127.0.0.1', 0), logRequests=False, allow_none=True)
+        self.server.register_instance(NamespaceDispatcher(loader=interface))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        return ServerProxy('http://%s:%d/RPC2' % (host, port))
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Cases
+#
+# Each case is a (fixture, runner) pair. The fixture builds a populated
+# interface (untimed); the runner returns (run, ops), where `run` performs
+# `ops` operations per call against `target`, which is either the interface
+# itself or its XML-RPC proxy.
+
+def groups_fixture(count):
+    interface = make_interface()
+    fill_groups(interface, count)
+    return interface
+
+
+def group_fixture(size):
+    interface = make_interface()
+    fill_group(interface, 'fleet', size)
+    return interface
+
+
+def run_addGroup(target, size):
+    counter = [0]
+    ops = 100
+
+    def run():
+        start = counter[0]
+        counter[0] += ops
+        for i in range(start, start + ops):
+            target.addGroup('bench_%d' % i)
+    return run, ops
+
+
+def run_addProgramToGroup(target, size):
+    counter = [0]
+    ops = 20
+
+    def run():
+        start = counter[0]
+        counter[0] += ops
+        for i in range(start, start + ops):
+            target.addProgramToGroup(
+                'fleet', 'bench_%d' % i, dict(PROGRAM_OPTIONS))
+    return run, ops
+
+
+def run_getGroupNames(target, size):
+    ops = 10
+
+    if isinstance(target, LoaderNamespaceRPCInterface):
+        # include the response marshalling supervisord would perform
+        def run():
+            for _ in range(ops):
+                dumps((target.getGroupNames(),), methodresponse=True)
+    else:
+        def run():
+            for _ in range(ops):
+                target.getGroupNames()
+    return run, ops
+
+
+def run_hasProcessInGroup(target, size):
+    # the fixture creates filler_0 ... filler_{size - 1}
+    hit = 'filler_%d' % (size - 1)
+    lookups = [
+        ('fleet', hit),                 # hit
+        ('fleet', 'missing_process'),   # miss in an existing group
+        ('missing_group', hit),         # miss on the group itself
+    ]
+    assert target.hasProcessInGroup('fleet', hit)
+    ops = 3000
+
+    def run():
+        for _ in range(ops // len(lookups)):
+            for group_name, process_name in lookups:
+                target.hasProcessInGroup(group_name, process_name)
+    return run, ops
+
+
+def build_cases(sizes):
+    """
+    Returns a list of (name, fixture, runner, size, over_xmlrpc) tuples.
+    Only the largest size of each case is also run over XML-RPC.
+    """
+    largest = max(sizes)
+    cases = [
+        ('addGroup[existing=%d]' % largest,
+         groups_fixture, run_addGroup, largest, True),
+        ('getGroupNames[groups=%d]' % largest,
+         groups_fixture, run_getGroupNames, largest, True),
+    ]
+    for size in sizes:
+        cases.append(('addProgramToGroup[size=%d]' % size,
+                      group_fixture, run_addProgramToGroup, size,
+                      size == largest))
+        cases.append(('hasProcessInGroup[size=%d]' % size,
+                      group_fixture, run_hasProcessInGroup, size,
+                      size == largest))
+    return cases
+
+
+# Runner
+
+def measure(run, ops, repeat):
+    timings = sorted(timeit.repeat(run, number=1, repeat=repeat))
+    return timings[len(timings) // 2] / ops
+
+
+def run_cases(sizes, repeat, use_xmlrpc=True):
+    results = {}
+    for name, fixture, runner, size, over_xmlrpc in build_cases(sizes):
+        key = 'inproc:%s' % name
+        run, ops = runner(fixture(size), size)
+        results[key] = measure(run, ops, repeat)
+        report(key, results[key])
+
+        if use_xmlrpc and over_xmlrpc:
+            key = 'xmlrpc:%s' % name
+            with LocalServer(fixture(size)) as client:
+                run, ops = runner(client.loader, size)
+                results[key] = measure(run, ops, repeat)
+            report(key, results[key])
+    return results
+
+
+def report(name, per_op):
+    print('%-45s %12.2f us/op' % (name, per_op * 1e6))
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    data = {
+        'format': BASELINE_FORMAT,
+        'python': platform.python_version(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(baseline, results, threshold):
+    """
+    Returns a list of (name, baseline, current) tuples for every case that
+    regressed by more than `threshold` (a fraction, e.g. 0.25 for 25%).
+    """
+    regressions = []
+    previous = baseline.get('results', {})
+    for name in sorted(results):
+        if name not in previous:
+            print('%-45s (no baseline)' % name)
+            continue
+        ratio = results[name] / previous[name]
+        print('%-45s %+10.1f%%' % (name, (ratio - 1) * 100))
+        if ratio > 1 + threshold:
+            regressions.append((name, previous[name], results[name]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='path of the JSON baseline file')
+    parser.add_argument('--save', action='store_true',
+                        help='write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=float(
+                        os.environ.get('LOADER_BENCH_THRESHOLD',
+                                       DEFAULT_THRESHOLD)),
+                        help='allowed slowdown as a fraction (default: '
+                             '%(default)s, or $LOADER_BENCH_THRESHOLD)')
+    parser.add_argument('--repeat', type=int, default=7,
+                        help='timed repetitions per case (median is used)')
+    parser.add_argument('--quick', action='store_true',
+                        help='skip the 10k-sized cases')
+    parser.add_argument('--no-xmlrpc', action='store_true',
+                        help='only run the in-process cases')
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else FLEET_SIZES
+    results = run_cases(sizes, args.repeat, not args.no_xmlrpc)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print('baseline written to %s' % args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print('no baseline at %s; run with --save to create one'
+              % args.baseline)
+        return 0
+
+    print('')
+    regressions = compare(baseline, results, args.threshold)
+    for name, before, after in regressions:
+        print('REGRESSION %s: %.2f us/op -> %.2f us/op'
+              % (name, before * 1e6, after * 1e6))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
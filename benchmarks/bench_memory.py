@@ -0,0 +1,72 @@
+"""
+Measures the memory added per process instance by addProgramToGroup, with
+and without the loader's compact process configs (slotted configs and
+option values shared between instances of a program).
+
+Usage:
+    python benchmarks/bench_memory.py                   # 10,000 instances
+    python benchmarks/bench_memory.py --instances 1000
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from bench_loader import PROGRAM_OPTIONS
+from bench_loader import make_interface
+
+DEFAULT_INSTANCES = 10000
+
+# a program with the kind of options that are identical across instances
+WORKER_OPTIONS = dict(
+    PROGRAM_OPTIONS,
+    command='/usr/bin/python -m worker --queue default --concurrency 4',
+    directory='/srv/worker',
+    environment='PYTHONUNBUFFERED=1,APP_ENV=production,QUEUE=default',
+    exitcodes='0,2',
+)
+
+
+def measure(instances, compact):
+    """
+    Returns the number of bytes allocated per instance while adding
+    `instances` instances of a program to a group.
+    """
+    interface = make_interface(compact_configs=str(compact).lower())
+    interface.addGroup('workers')
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(instances):
+        interface.addProgramToGroup('workers', 'worker', dict(WORKER_OPTIONS))
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.size_diff for stat in stats) / float(instances)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--instances', type=int, default=DEFAULT_INSTANCES,
+                        help='number of instances to add (default: '
+                             '%(default)s)')
+    args = parser.parse_args(argv)
+
+    plain = measure(args.instances, compact=False)
+    compact = measure(args.instances, compact=True)
+
+    print('instances: %d' % args.instances)
+    print('%-10s %10.0f bytes/instance' % ('plain', plain))
+    print('%-10s %10.0f bytes/instance' % ('compact', compact))
+    print('%-10s %10.0f bytes/instance (%.1f%%)'
+          % ('saved', plain - compact, (plain - compact) / plain * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,21 @@
+import bisect
+import cProfile
+import functools
+import pstats
+import time
+import types
+
 from supervisor.options import UnhosedConfigParser
 from supervisor.options import ProcessGroupConfig
+from supervisor.options import ProcessConfig
+from supervisor.datatypes import Automatic
+from supervisor.datatypes import boolean
+from supervisor.process import Subprocess
 
+from supervisor import events
 from supervisor.states import SupervisorStates
+from supervisor.states import ProcessStates
+from supervisor.states import getProcessStateDescription
 from supervisor.states import STOPPED_STATES
 from supervisor.xmlrpc import Faults
 from supervisor.xmlrpc import RPCError
@@ -9,6 +23,28 @@ import supervisor.loggers
 
 API_VERSION = '1.0'
 
+# single character codes used by getStateSummary to pack process states
+STATE_CODES = {
+    ProcessStates.STOPPED: 'S',
+    ProcessStates.STARTING: 'T',
+    ProcessStates.RUNNING: 'R',
+    ProcessStates.BACKOFF: 'B',
+    ProcessStates.STOPPING: 'P',
+    ProcessStates.EXITED: 'E',
+    ProcessStates.FATAL: 'F',
+    ProcessStates.UNKNOWN: 'U',
+}
+
+# process config parameters shared between instances of the same program
+# when their values are equal; everything but the (unique) process name
+SHARED_PARAM_NAMES = tuple(
+    name for name in
+    ProcessConfig.req_param_names + ProcessConfig.optional_param_names
+    if name != 'name')
+
+# RPC methods that are never wrapped by the profiler
+PROFILER_EXEMPT_METHODS = ('startProfiling', 'getProfile')
+
 
 class CountCache:
     """
@@ -43,10 +79,355 @@ class CountCache:
 
 
 
+class CompactProcessConfig(ProcessConfig):
+    """
+    A ProcessConfig that keeps its parameters in slots rather than in a
+    per-instance __dict__. ProcessConfig sets more attributes than CPython
+    will share dict keys for, so every instance otherwise carries a full
+    dict of its own. `program_name` is set by the loader for the processes
+    it adds (see addProgramToGroup).
+    """
+    __slots__ = tuple(
+        ['options', 'program_name'] +
+        ProcessConfig.req_param_names +
+        ProcessConfig.optional_param_names)
+
+
+
+class SharedOptionValues:
+    """
+    Shares equal parameter values between the process configs of a program,
+    so that instances that differ only by name reference a single copy of
+    the command, environment dict, exitcodes, etc. The shared values must
+    be treated as immutable; exitcodes are stored as a tuple to that end.
+
+    The values are never evicted: the cache holds one small dict per
+    program name the loader has ever added, which is bounded by the
+    number of distinct programs rather than by the number of processes.
+    """
+    def __init__(self):
+        self._values = {}
+
+    def share(self, program_name, config):
+        values = self._values.setdefault(program_name, {})
+        for name in SHARED_PARAM_NAMES:
+            value = getattr(config, name)
+            if name == 'exitcodes' and isinstance(value, list):
+                value = tuple(value)
+            shared = values.get(name)
+            if (name in values and type(shared) is type(value) and
+                    shared == value):
+                value = shared
+            else:
+                values[name] = value
+            setattr(config, name, value)
+
+
+
+class LazyLogSubprocess(Subprocess):
+    """
+    A Subprocess whose automatic (AUTO) child log files are created when it
+    is first spawned rather than when it is added, so that configured but
+    never-started processes don't leave files in the child log directory.
+    Until then, the deferred log files are reported as absent (None).
+    """
+    def __init__(self, config):
+        Subprocess.__init__(self, config)
+        self.deferred_logs = []
+        for channel in ('stdout', 'stderr'):
+            attr = '%s_logfile' % channel
+            if getattr(config, attr) is Automatic:
+                setattr(config, attr, None)
+                self.deferred_logs.append(attr)
+
+    def spawn(self):
+        if self.deferred_logs and not self.pid:
+            try:
+                self._create_deferred_logs()
+            except (OSError, IOError) as why:
+                # report it like Subprocess.spawn reports its own failures;
+                # an exception here would escape supervisord's main loop
+                self.laststart = time.time()
+                self._assertInState(
+                    ProcessStates.EXITED, ProcessStates.FATAL,
+                    ProcessStates.BACKOFF, ProcessStates.STOPPED)
+                self.change_state(ProcessStates.STARTING)
+                self.record_spawnerr(
+                    'could not create child logs for \'%s\': %s'
+                    % (self.config.name, why))
+                self.change_state(ProcessStates.BACKOFF)
+                return
+        return Subprocess.spawn(self)
+
+    def _create_deferred_logs(self):
+        for attr in self.deferred_logs:
+            setattr(self.config, attr, Automatic)
+        try:
+            self.config.create_autochildlogs()
+        except:
+            # keep deferring the logs that weren't created, so a retry
+            # doesn't spawn with the Automatic marker as a filename
+            remaining = []
+            for attr in self.deferred_logs:
+                if getattr(self.config, attr) is Automatic:
+                    setattr(self.config, attr, None)
+                    remaining.append(attr)
+            self.deferred_logs = remaining
+            raise
+        self.deferred_logs = []
+
+
+
+class GroupView:
+    """
+    A view of a single process group: its processes keyed by name and the
+    process names in sorted order, loaded on first use and reloaded when
+    the group's processes change.
+    """
+    def __init__(self, group):
+        self.group = group
+        self._processes = None
+        self._names = None
+
+    def _stale(self):
+        processes = self.group.processes
+        if self._processes is None or len(processes) != len(self._processes):
+            return True
+        # processes can be replaced without changing the count (e.g. a
+        # remove + add by another plugin), so compare the process objects
+        cached = self._processes
+        for name, process in processes.items():
+            if cached.get(name) is not process:
+                return True
+        return False
+
+    def _load(self):
+        if self._stale():
+            self._processes = dict(self.group.processes)
+            self._names = sorted(self._processes)
+
+    def names(self):
+        self._load()
+        return self._names
+
+    def count(self):
+        return len(self.group.processes)
+
+    def has_process(self, process_name):
+        return process_name in self.group.processes
+
+    def add_process(self, process_name, process):
+        if self._names is None:
+            return
+        if process_name not in self._processes:
+            bisect.insort(self._names, process_name)
+        self._processes[process_name] = process
+
+    def processes(self):
+        """
+        Returns the processes in name-sorted order.
+        """
+        self._load()
+        return [self._processes[name] for name in self._names]
+
+
+
+class TopologyView:
+    """
+    Caches the supervisor process group topology for the read-only RPC
+    methods. The loader updates it incrementally as it adds groups and
+    processes. Changes made outside the loader (e.g. supervisorctl update)
+    bump the generation, and the view is rebuilt on the next read.
+    """
+    def __init__(self, supervisord):
+        self.supervisord = supervisord
+        self.generation = 0
+        self._built_generation = None
+        self._groups = {}
+        self._names = []
+
+    def invalidate(self, event=None):
+        if not self._reflects(event):
+            self.generation += 1
+
+    def _reflects(self, event):
+        """
+        Returns whether the view already reflects a process group event,
+        as it does for the ones the loader publishes after updating it.
+        """
+        if event is None or self._built_generation != self.generation:
+            return False
+        group = self.supervisord.process_groups.get(event.group)
+        view = self._groups.get(event.group)
+        if isinstance(event, events.ProcessGroupAddedEvent):
+            return view is not None and view.group is group
+        return group is None and view is None
+
+    def _fresh(self):
+        return (self._built_generation == self.generation and
+                len(self._groups) == len(self.supervisord.process_groups))
+
+    def _refresh(self):
+        if not self._fresh():
+            process_groups = self.supervisord.process_groups
+            self._groups = dict(
+                (name, GroupView(group))
+                for name, group in process_groups.items())
+            self._names = sorted(self._groups)
+            self._built_generation = self.generation
+        return self._groups
+
+    def group_names(self):
+        """
+        Returns the sorted group names. The list is shared with the view
+        and must not be modified by the caller.
+        """
+        self._refresh()
+        return self._names
+
+    def group(self, group_name):
+        """
+        Returns the GroupView for a group, or None if it doesn't exist.
+        """
+        return self._refresh().get(group_name)
+
+    def add_group(self, group_name, group):
+        # nothing to maintain until the view has been built; the next
+        # read will include the group anyway
+        if self._built_generation != self.generation:
+            return
+        if group_name not in self._groups:
+            bisect.insort(self._names, group_name)
+        self._groups[group_name] = GroupView(group)
+
+    def add_process(self, group_name, process_name, process):
+        if self._built_generation != self.generation:
+            return
+        view = self._groups.get(group_name)
+        if view is not None:
+            view.add_process(process_name, process)
+
+
+
+class LoaderProgramAddedEvent(events.Event):
+    """
+    Published when the loader adds processes for a program. Processes added
+    between two TICK_5 events are coalesced into a single event per group
+    and program.
+    """
+    def __init__(self, group, program, process_names):
+        self.group = group
+        self.program = program
+        self.process_names = process_names
+
+    def payload(self):
+        header = 'groupname:%s programname:%s count:%d\n' % (
+            self.group, self.program, len(self.process_names))
+        return header + '\n'.join(self.process_names)
+
+events.register('LOADER_PROGRAM_ADDED', LoaderProgramAddedEvent)
+
+
+
+class ProgramEventBatcher:
+    """
+    Collects the processes added by the loader and publishes them as one
+    LoaderProgramAddedEvent per group and program on the next TICK_5 event,
+    so that a scale-up made of many separate RPC calls yields one event.
+    """
+    def __init__(self):
+        self._pending = {}
+        self._order = []
+
+    def add(self, group_name, program_name, process_names):
+        key = (group_name, program_name)
+        if key not in self._pending:
+            self._pending[key] = []
+            self._order.append(key)
+        self._pending[key].extend(process_names)
+
+    def flush(self, event=None):
+        """
+        Publishes all pending batches.
+        """
+        pending, order = self._pending, self._order
+        self._pending, self._order = {}, []
+        for group_name, program_name in order:
+            events.notify(LoaderProgramAddedEvent(
+                group_name, program_name, pending[group_name, program_name]))
+
+
+
+class ProfileWindow:
+    """
+    Accumulates cProfile data for a bounded number of loader RPC calls
+    and/or a bounded number of seconds, whichever limit is reached first.
+    """
+    def __init__(self, calls=0, seconds=0):
+        self.profiler = cProfile.Profile()
+        self.max_calls = calls
+        self.deadline = time.time() + seconds if seconds else None
+        self.calls = 0
+        self.active = True
+        self._depth = 0
+
+    def expired(self):
+        if self.max_calls and self.calls >= self.max_calls:
+            return True
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def enter(self):
+        # nested loader calls (e.g. addProgramToGroup -> addGroup) are
+        # profiled as part of the outermost call
+        if self._depth == 0:
+            self.calls += 1
+            self.profiler.enable()
+        self._depth += 1
+
+    def exit(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self.profiler.disable()
+        return self._depth == 0
+
+    def stats(self, top, sort):
+        """
+        Returns the top `top` entries of the collected profile, ordered
+        by the pstats sort key `sort`.
+        """
+        if self.calls == 0:
+            return []
+        stats = pstats.Stats(self.profiler)
+        stats.sort_stats(sort)
+        rows = []
+        for func in stats.fcn_list[:top]:
+            primcalls, ncalls, tottime, cumtime, _ = stats.stats[func]
+            filename, lineno, function = func
+            rows.append({
+                'function': function,
+                'filename': filename,
+                'lineno': lineno,
+                'ncalls': ncalls,
+                'primcalls': primcalls,
+                'tottime': tottime,
+                'cumtime': cumtime,
+            })
+        return rows
+
+
+
 class LoaderNamespaceRPCInterface:
     def __init__(self, supervisord, **kwargs):
         self.supervisord = supervisord
+        self.lazy_childlogs = boolean(kwargs.get('lazy_childlogs', 'false'))
+        self.compact_configs = boolean(kwargs.get('compact_configs', 'true'))
+        self.shared_values = SharedOptionValues()
+        self.program_events = ProgramEventBatcher()
+        events.subscribe(events.Tick5Event, self.program_events.flush)
         self.numprocs = CountCache()
+        self.profile = None
+        self.topology = TopologyView(supervisord)
+        events.subscribe(events.ProcessGroupEvent, self.topology.invalidate)
 
 
     def _update(self, function_name):
@@ -70,13 +451,15 @@ class LoaderNamespaceRPCInterface:
 
     def getGroupNames(self):
         """
-        Returns a list of the supervisor process groups.
+        Returns a sorted list of the supervisor process group names.
         
         Returns:
             list
         """
         self._update('getGroupNames')
-        return list(self.supervisord.process_groups.keys())
+        # copy, so the result doesn't change with later additions (e.g.
+        # within a system.multicall, whose results are marshalled last)
+        return list(self.topology.group_names())
 
 
     def hasGroup(self, group_name):
@@ -89,8 +472,7 @@ class LoaderNamespaceRPCInterface:
         Returns:
             bool
         """
-        group = self.supervisord.process_groups.get(group_name)
-        return group is not None
+        return self.topology.group(group_name) is not None
 
 
     def hasProcessInGroup(self, group_name, process_name):
@@ -104,11 +486,72 @@ class LoaderNamespaceRPCInterface:
         Returns:
             bool
         """
-        try:
-            group = self._get_process_group(group_name, False)
-        except RPCError as e:
-            return False
-        return group.processes.get(process_name) is not None
+        group = self.topology.group(group_name)
+        return group is not None and group.has_process(process_name)
+
+
+    def getStateSummary(self, group_name=None, with_names=False):
+        """
+        Returns a compact summary of process states, per group. Each
+        process state is packed as a single character code (see
+        STATE_CODES) in name-sorted order, so a client that has fetched
+        the names once can map codes back to processes.
+
+        Args:
+            group_name (str, optional): The name of the group to summarize.
+                Defaults to summarizing every group.
+            with_names (bool, optional): Whether to include the sorted
+                process names. Defaults to False.
+
+        Raises:
+            RPCError: BAD_NAME if the group doesn't exist
+
+        Returns:
+            list: A dict per group with the keys `group`, `total`, `states`
+                (state name -> count), `programs` (program name -> state
+                name -> count), `codes` and optionally `names`.
+        """
+        self._update('getStateSummary')
+
+        if group_name:
+            if self.topology.group(group_name) is None:
+                raise RPCError(Faults.BAD_NAME, 'group: %s' % group_name)
+            group_names = [group_name]
+        else:
+            group_names = self.topology.group_names()
+
+        return [self._summarize_group(name, with_names)
+                for name in group_names]
+
+
+    def _summarize_group(self, group_name, with_names):
+        view = self.topology.group(group_name)
+        names = view.names()
+        states = []
+
+        state_counts = {}
+        program_counts = {}
+        for process in view.processes():
+            state = process.get_state()
+            states.append(state)
+            # processes not added by the loader are attributed to a program
+            # named after the group, as supervisor does for [program:x]
+            program = getattr(process.config, 'program_name', group_name)
+            description = getProcessStateDescription(state)
+            state_counts[description] = state_counts.get(description, 0) + 1
+            counts = program_counts.setdefault(program, {})
+            counts[description] = counts.get(description, 0) + 1
+
+        summary = {
+            'group': group_name,
+            'total': view.count(),
+            'states': state_counts,
+            'programs': program_counts,
+            'codes': ''.join([STATE_CODES[state] for state in states]),
+        }
+        if with_names:
+            summary['names'] = list(names)
+        return summary
 
 
     def log(self, message, level=supervisor.loggers.LevelsByName.INFO):
@@ -161,7 +604,10 @@ class LoaderNamespaceRPCInterface:
             options, group_name, priority, process_configs=[])
         self.supervisord.options.process_group_configs.append(group_config)
         group_config.after_setuid()
-        self.supervisord.process_groups[group_name] = group_config.make_group()
+        group = group_config.make_group()
+        self.supervisord.process_groups[group_name] = group
+        self.topology.add_group(group_name, group)
+        events.notify(events.ProcessGroupAddedEvent(group_name))
 
         return True
 
@@ -173,7 +619,7 @@ class LoaderNamespaceRPCInterface:
         # replace any instances of the process_num interpolation with the
         # determined process_num value
         target = '%(process_num)02d'
-        for key, value in config.iteritems():
+        for key, value in config.items():
             config[key] = value.replace(target, process_num)
         
         return config
@@ -206,11 +652,15 @@ class LoaderNamespaceRPCInterface:
         
         # make the process configs from the parser instance
         options = self.supervisord.options
+        klass = CompactProcessConfig if self.compact_configs else None
         try:
             new_configs = options.processes_from_section(
-                parser, section_name, group_name)
+                parser, section_name, group_name, klass)
         except ValueError as e:
             raise RPCError(Faults.INCORRECT_PARAMETERS, e)
+        if self.compact_configs:
+            for new_config in new_configs:
+                self.shared_values.share(program_name, new_config)
         
         # make sure the new program doesn't already exist in the group
         for new_config in new_configs:
@@ -221,13 +671,41 @@ class LoaderNamespaceRPCInterface:
         # add the new program configuration(s) to the group
         group.config.process_configs.extend(new_configs)
         for new_config in new_configs:
-            new_config.create_autochildlogs()
-            group.processes[new_config.name] = new_config.make_process(group)
+            # recorded on the config rather than in this interface, since
+            # supervisord creates an interface per HTTP server
+            new_config.program_name = program_name
+            process = self._make_process(new_config, group)
+            group.processes[new_config.name] = process
+            self.topology.add_process(group_name, new_config.name, process)
+        self.program_events.add(
+            group_name, program_name,
+            [new_config.name for new_config in new_configs])
         
         self.numprocs.increment(program_name)
         return True
 
 
+    def _make_process(self, config, group):
+        """
+        Creates the process for a new process config. With lazy_childlogs
+        enabled, automatic child log files are created at first spawn.
+
+        Args:
+            config (ProcessConfig): The process configuration.
+            group (ProcessGroup): The group the process belongs to.
+
+        Returns:
+            (Subprocess): The new process
+        """
+        if not self.lazy_childlogs:
+            config.create_autochildlogs()
+            return config.make_process(group)
+
+        process = LazyLogSubprocess(config)
+        process.group = group
+        return process
+
+
     def _get_process_group(self, group_name, create_group_if_not_exists=True):
         """
         Retrieves the process group config for a specified process group.
@@ -272,5 +750,126 @@ class LoaderNamespaceRPCInterface:
 
 
 
+    def startProfiling(self, calls=0, seconds=0):
+        """
+        Starts collecting cProfile data for subsequent loader RPC calls.
+        Profiling stops after `calls` calls or `seconds` seconds, whichever
+        comes first; a limit of 0 means that limit is not used.
+
+        supervisord creates a loader instance per HTTP server (e.g. one for
+        [unix_http_server] and one for [inet_http_server]). Only calls made
+        through the same server as startProfiling are profiled, and
+        getProfile must be called through that server as well.
+
+        Args:
+            calls (int, optional): The number of calls to profile.
+            seconds (int, optional): The number of seconds to profile for.
+
+        Raises:
+            RPCError: INCORRECT_PARAMETERS if neither limit is positive
+            RPCError: ALREADY_STARTED if profiling is already in progress
+
+        Returns:
+            boolean: True, unless an error was raised.
+        """
+        self._update('startProfiling')
+
+        if self.profile is not None and self.profile.active:
+            if not self.profile.expired():
+                raise RPCError(Faults.ALREADY_STARTED, 'profiling')
+            self._stop_profiling()
+
+        try:
+            calls, seconds = int(calls), float(seconds)
+        except (TypeError, ValueError):
+            raise RPCError(Faults.INCORRECT_PARAMETERS)
+        if calls < 0 or seconds < 0 or not (calls or seconds):
+            raise RPCError(Faults.INCORRECT_PARAMETERS)
+
+        self.profile = ProfileWindow(calls, seconds)
+        for name in self._profiled_method_names():
+            method = getattr(self, name)
+            setattr(self, name, types.MethodType(
+                self._make_profiled(method, self.profile), self))
+        return True
+
+
+    def getProfile(self, top=20, sort='cumulative'):
+        """
+        Returns the profile collected since the last startProfiling call.
+
+        Args:
+            top (int, optional): The number of entries to return.
+                Defaults to 20.
+            sort (str, optional): The pstats sort key to order entries by.
+                Defaults to 'cumulative'.
+
+        Raises:
+            RPCError: INCORRECT_PARAMETERS if `top` or `sort` is invalid
+
+        Returns:
+            dict: `active` (bool), `calls` (int) and `stats`, a list of
+                dicts with the keys function, filename, lineno, ncalls,
+                primcalls, tottime and cumtime.
+        """
+        self._update('getProfile')
+
+        window = self.profile
+        if window is None:
+            return {'active': False, 'calls': 0, 'stats': []}
+        if window.active and window.expired():
+            self._stop_profiling()
+
+        if not isinstance(top, int) or top < 0:
+            raise RPCError(Faults.INCORRECT_PARAMETERS)
+        try:
+            stats = window.stats(top, sort)
+        except KeyError:
+            raise RPCError(Faults.INCORRECT_PARAMETERS)
+
+        return {'active': window.active, 'calls': window.calls, 'stats': stats}
+
+
+    def _profiled_method_names(self):
+        """
+        Returns the names of the public RPC methods the profiler wraps.
+        """
+        names = []
+        for name in dir(type(self)):
+            if name.startswith('_') or name in PROFILER_EXEMPT_METHODS:
+                continue
+            if callable(getattr(type(self), name)):
+                names.append(name)
+        return names
+
+
+    def _make_profiled(self, method, window):
+        """
+        Wraps a bound RPC method so that its calls are recorded in the
+        profile window. The wrappers live on the instance only while the
+        window is active, so there is no overhead when profiling is off.
+        """
+        # keep the name and docstring for system.methodHelp/methodSignature
+        @functools.wraps(method)
+        def profiled(interface, *args, **kwargs):
+            if window.expired():
+                interface._stop_profiling()
+                return method(*args, **kwargs)
+            window.enter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                if window.exit() and window.expired():
+                    interface._stop_profiling()
+        return profiled
+
+
+    def _stop_profiling(self):
+        for name in self._profiled_method_names():
+            self.__dict__.pop(name, None)
+        self.profile.active = False
+
+
+
 def make_loader_rpcinterface(supervisord, **config):
     return LoaderNamespaceRPCInterface(supervisord, **config)
@@ -1,12 +1,23 @@
+import os
 import sys
+import types
 import unittest
 
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
 import supervisor
+from supervisor.process import Subprocess
 from supervisor.xmlrpc import Faults as SupervisorFaults
 from supervisor.states import SupervisorStates
 from supervisor.states import ProcessStates
 
 from supervisor_loader.rpcinterface import Faults as LoaderFaults
+from supervisor_loader.rpcinterface import CompactProcessConfig
+from supervisor_loader.rpcinterface import LazyLogSubprocess
+from supervisor_loader.rpcinterface import LoaderProgramAddedEvent
 
 from supervisor.tests.base import DummySupervisor
 from supervisor.tests.base import DummyPConfig
@@ -17,6 +28,11 @@ from supervisor.tests.base import DummyProcessGroup
 
 class TestRPCInterface(unittest.TestCase):
 
+    def tearDown(self):
+        from supervisor import events
+
+        events.clear()
+
     # Fault Constants
 
     def test_loader_fault_names_dont_clash_with_supervisord_fault_names(self):
@@ -97,6 +113,26 @@ class TestRPCInterface(unittest.TestCase):
         self.assertEqual(1, len(interface.supervisord.process_groups))
         self.assertTrue("group" in interface.supervisord.process_groups)
 
+    def test_addGroup_publishes_process_group_added_event(self):
+        from supervisor import events
+
+        supervisord = DummySupervisor()
+        supervisord.options = supervisor.options.ServerOptions()
+        supervisord.options.process_group_configs = []
+        interface = self.makeOne(supervisord)
+        published = []
+        events.subscribe(events.ProcessGroupAddedEvent, published.append)
+        interface.getGroupNames()
+        generation = interface.topology.generation
+
+        self.assertTrue(interface.addGroup("group", 999))
+
+        self.assertEqual(1, len(published))
+        self.assertEqual("group", published[0].group)
+        # the loader's own event doesn't force a topology rebuild
+        self.assertEqual(generation, interface.topology.generation)
+        self.assertEqual(["group"], interface.getGroupNames())
+
     def test_addGroup_raises_already_added_when_group_already_exists(self):
         pconfig = DummyPConfig(None, "foo", "/bin/foo")
         gconfig = DummyPGroupConfig(None, pconfigs=[pconfig])
@@ -140,6 +176,206 @@ class TestRPCInterface(unittest.TestCase):
         names.index("foo")
         names.index("bar")
 
+    def test_getGroupNames_includes_groups_added_by_loader(self):
+        supervisord = DummySupervisor()
+        supervisord.options = supervisor.options.ServerOptions()
+        supervisord.options.process_group_configs = []
+        interface = self.makeOne(supervisord)
+
+        self.assertEqual([], interface.getGroupNames())
+        interface.addGroup("foo")
+        interface.addGroup("bar")
+
+        self.assertEqual(["bar", "foo"], interface.getGroupNames())
+
+    def test_getGroupNames_result_is_unaffected_by_later_additions(self):
+        supervisord = DummySupervisor()
+        supervisord.options = supervisor.options.ServerOptions()
+        supervisord.options.process_group_configs = []
+        interface = self.makeOne(supervisord)
+        interface.addGroup("a")
+        names = interface.getGroupNames()
+
+        interface.addGroup("b")
+
+        self.assertEqual(["a"], names)
+        self.assertEqual(["a", "b"], interface.getGroupNames())
+
+    def test_getGroupNames_rebuilds_after_process_group_event(self):
+        from supervisor import events
+
+        pconfig = DummyPConfig(None, "foo", "/bin/foo")
+        gconfig = DummyPGroupConfig(None, pconfigs=[pconfig])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroups = {"foo": pgroup}
+        supervisord = DummySupervisor(process_groups=pgroups)
+        interface = self.makeOne(supervisord)
+        self.assertEqual(["foo"], interface.getGroupNames())
+
+        # replace a group without changing the number of groups, as
+        # supervisorctl update would
+        del pgroups["foo"]
+        events.notify(events.ProcessGroupRemovedEvent("foo"))
+        pgroups["bar"] = pgroup
+        events.notify(events.ProcessGroupAddedEvent("bar"))
+
+        self.assertEqual(["bar"], interface.getGroupNames())
+
+    # API Method loader.hasGroup()
+
+    def test_hasGroup_returns_whether_group_exists(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"foo": pgroup})
+        interface = self.makeOne(supervisord)
+
+        self.assertTrue(interface.hasGroup("foo"))
+        self.assertFalse(interface.hasGroup("bar"))
+
+    # API Method loader.hasProcessInGroup()
+
+    def test_hasProcessInGroup_returns_whether_process_exists(self):
+        pconfig = DummyPConfig(None, "foo", "/bin/foo")
+        gconfig = DummyPGroupConfig(None, pconfigs=[pconfig])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {"foo": DummyProcess(pconfig)}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        interface = self.makeOne(supervisord)
+
+        self.assertTrue(interface.hasProcessInGroup("group_name", "foo"))
+        self.assertFalse(interface.hasProcessInGroup("group_name", "bar"))
+        self.assertFalse(interface.hasProcessInGroup("other_group", "foo"))
+
+    def test_hasProcessInGroup_sees_processes_added_outside_loader(self):
+        pconfig = DummyPConfig(None, "foo", "/bin/foo")
+        gconfig = DummyPGroupConfig(None, pconfigs=[pconfig])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        interface = self.makeOne(supervisord)
+        self.assertFalse(interface.hasProcessInGroup("group_name", "foo"))
+
+        pgroup.processes["foo"] = DummyProcess(pconfig)
+
+        self.assertTrue(interface.hasProcessInGroup("group_name", "foo"))
+
+    def test_hasProcessInGroup_sees_processes_replaced_outside_loader(self):
+        foo = DummyPConfig(None, "foo", "/bin/foo")
+        bar = DummyPConfig(None, "bar", "/bin/bar")
+        gconfig = DummyPGroupConfig(None, pconfigs=[foo])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {"foo": DummyProcess(foo)}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        interface = self.makeOne(supervisord)
+        self.assertTrue(interface.hasProcessInGroup("group_name", "foo"))
+        interface.getStateSummary("group_name", True)
+
+        # remove + add, leaving the number of processes unchanged
+        del pgroup.processes["foo"]
+        pgroup.processes["bar"] = DummyProcess(bar, ProcessStates.RUNNING)
+
+        self.assertFalse(interface.hasProcessInGroup("group_name", "foo"))
+        self.assertTrue(interface.hasProcessInGroup("group_name", "bar"))
+        summary = interface.getStateSummary("group_name", True)
+        self.assertEqual(["bar"], summary[0]["names"])
+        self.assertEqual("R", summary[0]["codes"])
+
+    # API Method loader.getStateSummary()
+
+    def test_getStateSummary_summarizes_every_group(self):
+        foo = DummyPConfig(None, "foo", "/bin/foo")
+        bar = DummyPConfig(None, "bar", "/bin/bar")
+        baz = DummyPConfig(None, "baz", "/bin/baz")
+        gconfig = DummyPGroupConfig(None, pconfigs=[foo, bar, baz])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {
+            "foo": DummyProcess(foo, ProcessStates.RUNNING),
+            "bar": DummyProcess(bar, ProcessStates.FATAL),
+            "baz": DummyProcess(baz, ProcessStates.RUNNING),
+        }
+        empty = DummyProcessGroup(DummyPGroupConfig(None, pconfigs=[]))
+        empty.processes = {}
+        pgroups = {"group_name": pgroup, "empty": empty}
+        supervisord = DummySupervisor(process_groups=pgroups)
+        interface = self.makeOne(supervisord)
+        summary = interface.getStateSummary()
+
+        self.assertEqual("getStateSummary", interface.update_text)
+        self.assertEqual(2, len(summary))
+        self.assertEqual("empty", summary[0]["group"])
+        self.assertEqual(0, summary[0]["total"])
+        self.assertEqual("", summary[0]["codes"])
+
+        group = summary[1]
+        self.assertEqual("group_name", group["group"])
+        self.assertEqual(3, group["total"])
+        self.assertEqual({"RUNNING": 2, "FATAL": 1}, group["states"])
+        self.assertEqual({"group_name": {"RUNNING": 2, "FATAL": 1}},
+                         group["programs"])
+        self.assertEqual("FRR", group["codes"])
+        self.assertTrue("names" not in group)
+
+    def test_getStateSummary_includes_names_when_requested(self):
+        foo = DummyPConfig(None, "foo", "/bin/foo")
+        bar = DummyPConfig(None, "bar", "/bin/bar")
+        gconfig = DummyPGroupConfig(None, pconfigs=[foo, bar])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {
+            "foo": DummyProcess(foo, ProcessStates.STOPPED),
+            "bar": DummyProcess(bar, ProcessStates.STARTING),
+        }
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        interface = self.makeOne(supervisord)
+        summary = interface.getStateSummary("group_name", True)
+
+        self.assertEqual(1, len(summary))
+        self.assertEqual(["bar", "foo"], summary[0]["names"])
+        self.assertEqual("TS", summary[0]["codes"])
+
+    def test_getStateSummary_counts_states_per_loaded_program(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord)
+        poptions = {"command": "/usr/bin/find /", "stdout_logfile": "NONE",
+                    "stderr_logfile": "NONE"}
+
+        interface.addProgramToGroup("group_name", "finder", dict(poptions))
+        interface.addProgramToGroup("group_name", "finder", dict(poptions))
+        summary = interface.getStateSummary("group_name")
+
+        self.assertEqual(2, summary[0]["total"])
+        self.assertEqual({"finder": {"STOPPED": 2}}, summary[0]["programs"])
+        self.assertEqual("SS", summary[0]["codes"])
+
+    def test_getStateSummary_sees_programs_added_through_another_interface(self):
+        # supervisord creates an interface per HTTP server (unix and inet)
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        unix_interface = self.makeOne(supervisord)
+        inet_interface = self.makeOne(supervisord)
+        poptions = {"command": "/usr/bin/find /", "stdout_logfile": "NONE",
+                    "stderr_logfile": "NONE"}
+
+        unix_interface.addProgramToGroup("group_name", "worker", poptions)
+        summary = inet_interface.getStateSummary("group_name")
+
+        self.assertEqual({"worker": {"STOPPED": 1}}, summary[0]["programs"])
+
+    def test_getStateSummary_raises_bad_name_when_group_doesnt_exist(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+
+        self.assertRPCError(
+            SupervisorFaults.BAD_NAME, interface.getStateSummary, "missing"
+        )
+
 
     # API Method loader.addProgramToGroup()
 
@@ -291,6 +527,181 @@ class TestRPCInterface(unittest.TestCase):
         self.assertEqual(3, len(pgroup.config.process_configs))
         self.assertEqual(3, len(pgroup.processes))
 
+    def test_addProgramToGroup_creates_autochildlogs_immediately_by_default(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord)
+        poptions = {"command": "/usr/bin/find /", "stderr_logfile": "NONE"}
+
+        interface.addProgramToGroup("group_name", "new_process", poptions)
+        process = pgroup.processes["new_process_1"]
+
+        self.assertFalse(isinstance(process, LazyLogSubprocess))
+        self.assertTrue(isinstance(process.config.stdout_logfile, str))
+        os.remove(process.config.stdout_logfile)
+
+    def test_addProgramToGroup_defers_autochildlogs_when_lazy(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord, lazy_childlogs="true")
+        poptions = {"command": "/usr/bin/find /", "stderr_logfile": "NONE"}
+
+        interface.addProgramToGroup("group_name", "new_process", poptions)
+        process = pgroup.processes["new_process_1"]
+
+        self.assertTrue(isinstance(process, LazyLogSubprocess))
+        self.assertTrue(process.group is pgroup)
+        self.assertEqual(None, process.config.stdout_logfile)
+        self.assertEqual(None, process.config.stderr_logfile)
+
+        with mock.patch.object(Subprocess, "spawn") as spawn:
+            process.spawn()
+            process.spawn()
+
+        self.assertEqual(2, spawn.call_count)
+        self.assertTrue(isinstance(process.config.stdout_logfile, str))
+        self.assertEqual(None, process.config.stderr_logfile)
+        os.remove(process.config.stdout_logfile)
+
+    def test_lazy_process_backs_off_when_childlogs_cant_be_created(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        supervisord.options.logger = mock.Mock()
+        supervisord.options.childlogdir = "/nonexistent/childlogdir"
+        interface = self.makeOne(supervisord, lazy_childlogs="true")
+        poptions = {"command": "/usr/bin/find /", "stderr_logfile": "NONE"}
+
+        interface.addProgramToGroup("group_name", "new_process", poptions)
+        process = pgroup.processes["new_process_1"]
+
+        with mock.patch.object(Subprocess, "spawn") as spawn:
+            self.assertEqual(None, process.spawn())
+
+        self.assertEqual(0, spawn.call_count)
+        self.assertEqual(ProcessStates.BACKOFF, process.get_state())
+        self.assertTrue("could not create child logs" in process.spawnerr)
+        self.assertEqual(None, process.config.stdout_logfile)
+        self.assertEqual(["stdout_logfile"], process.deferred_logs)
+
+    def test_addProgramToGroup_shares_option_values_between_instances(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord)
+        poptions = {
+            "command": "/usr/bin/find /",
+            "environment": "FOO=1,BAR=2",
+            "exitcodes": "0,2",
+            "stdout_logfile": "NONE",
+            "stderr_logfile": "NONE",
+        }
+
+        interface.addProgramToGroup("group_name", "new_process", dict(poptions))
+        interface.addProgramToGroup("group_name", "new_process", dict(poptions))
+        first, second = pgroup.config.process_configs
+
+        self.assertTrue(isinstance(first, CompactProcessConfig))
+        self.assertFalse(hasattr(first, "__dict__") and first.__dict__)
+        self.assertEqual("new_process_1", first.name)
+        self.assertEqual("new_process_2", second.name)
+        self.assertTrue(first.command is second.command)
+        self.assertTrue(first.environment is second.environment)
+        self.assertEqual({"FOO": "1", "BAR": "2"}, second.environment)
+        self.assertTrue(first.exitcodes is second.exitcodes)
+        self.assertEqual((0, 2), second.exitcodes)
+
+    def test_addProgramToGroup_doesnt_share_differing_option_values(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord)
+
+        interface.addProgramToGroup(
+            "group_name", "new_process",
+            {"command": "/bin/foo", "stdout_logfile": "NONE",
+             "stderr_logfile": "NONE"})
+        interface.addProgramToGroup(
+            "group_name", "new_process",
+            {"command": "/bin/bar", "stdout_logfile": "NONE",
+             "stderr_logfile": "NONE"})
+        first, second = pgroup.config.process_configs
+
+        self.assertEqual("/bin/foo", first.command)
+        self.assertEqual("/bin/bar", second.command)
+
+    def test_addProgramToGroup_uses_plain_configs_when_compact_disabled(self):
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord, compact_configs="false")
+        poptions = {"command": "/usr/bin/find /", "stdout_logfile": "NONE",
+                    "stderr_logfile": "NONE"}
+
+        interface.addProgramToGroup("group_name", "new_process", dict(poptions))
+        config = pgroup.config.process_configs[0]
+
+        self.assertFalse(isinstance(config, CompactProcessConfig))
+        self.assertEqual([0], config.exitcodes)
+
+    def test_addProgramToGroup_publishes_one_event_per_tick(self):
+        from supervisor import events
+
+        gconfig = DummyPGroupConfig(None, pconfigs=[])
+        pgroup = DummyProcessGroup(gconfig)
+        pgroup.processes = {}
+        supervisord = DummySupervisor(process_groups={"group_name": pgroup})
+        supervisord.options = supervisor.options.ServerOptions()
+        interface = self.makeOne(supervisord)
+        poptions = {"command": "/usr/bin/find /", "stdout_logfile": "NONE",
+                    "stderr_logfile": "NONE"}
+        published = []
+        events.subscribe(LoaderProgramAddedEvent, published.append)
+
+        # separate RPC calls, as a client scaling up one call at a time
+        for _ in range(3):
+            interface.addProgramToGroup("group_name", "finder", dict(poptions))
+        self.assertEqual([], published)
+
+        events.notify(events.Tick5Event(0, supervisord))
+
+        self.assertEqual(1, len(published))
+        event = published[0]
+        self.assertEqual("group_name", event.group)
+        self.assertEqual("finder", event.program)
+        self.assertEqual(["finder_1", "finder_2", "finder_3"],
+                         event.process_names)
+        self.assertEqual(
+            "groupname:group_name programname:finder count:3\n"
+            "finder_1\nfinder_2\nfinder_3",
+            event.payload(),
+        )
+
+        events.notify(events.Tick5Event(5, supervisord))
+        self.assertEqual(1, len(published))
+
+    def test_loader_program_added_event_type_is_registered(self):
+        from supervisor import events
+
+        self.assertEqual(
+            "LOADER_PROGRAM_ADDED",
+            events.getEventNameByType(LoaderProgramAddedEvent),
+        )
+
 
     # API Method loader.removeProcessFromGroup()
 
@@ -424,6 +835,115 @@ class TestRPCInterface(unittest.TestCase):
                 SupervisorFaults.INCORRECT_PARAMETERS, interface.log, "hello", bad_level
             )
 
+    # API Method loader.startProfiling()
+
+    def test_startProfiling_wraps_methods_until_call_limit_is_reached(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+
+        self.assertTrue(interface.startProfiling(2))
+        self.assertEqual("startProfiling", interface.update_text)
+        self.assertTrue("getAPIVersion" in interface.__dict__)
+        self.assertTrue("getProfile" not in interface.__dict__)
+        self.assertTrue(isinstance(interface.getAPIVersion, types.MethodType))
+
+        interface.getAPIVersion()
+        self.assertTrue("getAPIVersion" in interface.__dict__)
+        interface.getAPIVersion()
+        self.assertTrue("getAPIVersion" not in interface.__dict__)
+
+        profile = interface.getProfile()
+        self.assertFalse(profile["active"])
+        self.assertEqual(2, profile["calls"])
+        functions = [row["function"] for row in profile["stats"]]
+        self.assertTrue("getAPIVersion" in functions)
+
+    def test_startProfiling_keeps_method_docstrings_for_introspection(self):
+        from supervisor.xmlrpc import SystemNamespaceRPCInterface
+
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+        interface.startProfiling(10)
+        system = SystemNamespaceRPCInterface([("loader", interface)])
+
+        self.assertEqual("getGroupNames", interface.getGroupNames.__name__)
+        self.assertEqual(
+            self.getTargetClass().getGroupNames.__doc__,
+            interface.getGroupNames.__doc__,
+        )
+        self.assertEqual(
+            system.methodHelp("loader.getGroupNames"),
+            interface.getGroupNames.__doc__,
+        )
+
+    def test_startProfiling_stops_once_duration_has_elapsed(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+
+        self.assertTrue(interface.startProfiling(0, 60))
+        interface.getAPIVersion()
+        interface.profile.deadline = 0
+        interface.getAPIVersion()
+
+        self.assertTrue("getAPIVersion" not in interface.__dict__)
+        self.assertFalse(interface.profile.active)
+        self.assertEqual(1, interface.profile.calls)
+
+    def test_startProfiling_raises_incorrect_parameters_without_a_limit(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+
+        for calls, seconds in [(0, 0), (-1, 0), (0, -1), ("bad", 0)]:
+            self.assertRPCError(
+                SupervisorFaults.INCORRECT_PARAMETERS,
+                interface.startProfiling,
+                calls,
+                seconds,
+            )
+
+    def test_startProfiling_raises_already_started_when_profiling(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+        interface.startProfiling(10)
+
+        self.assertRPCError(
+            SupervisorFaults.ALREADY_STARTED, interface.startProfiling, 10
+        )
+
+    # API Method loader.getProfile()
+
+    def test_getProfile_returns_empty_profile_when_never_started(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+        profile = interface.getProfile()
+
+        self.assertEqual("getProfile", interface.update_text)
+        self.assertEqual({"active": False, "calls": 0, "stats": []}, profile)
+
+    def test_getProfile_limits_entries_to_top(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+        interface.startProfiling(5)
+        interface.getGroupNames()
+        profile = interface.getProfile(1)
+
+        self.assertTrue(profile["active"])
+        self.assertEqual(1, profile["calls"])
+        self.assertEqual(1, len(profile["stats"]))
+
+    def test_getProfile_raises_incorrect_parameters_when_sort_is_bad(self):
+        supervisord = DummySupervisor()
+        interface = self.makeOne(supervisord)
+        interface.startProfiling(5)
+        interface.getGroupNames()
+
+        self.assertRPCError(
+            SupervisorFaults.INCORRECT_PARAMETERS,
+            interface.getProfile,
+            20,
+            "bad_sort",
+        )
+
     # Helpers Methods
 
     def getTargetClass(self):